@@ -48,6 +48,7 @@ VERBOSE_OUTPUT = False  # Extra verbose logging
 # Thermal Printer Settings
 THERMAL_PRINTER_ENABLED = True
 THERMAL_PRINTER_NAME = "XP-80"  # Default thermal printer name
+THERMAL_FEED_PACING = False  # Pace short word pauses with paper feed instead of sleeps
 
 # Voice Settings
 VOICE_ENABLED = True  # Set to True to enable voice output
@@ -0,0 +1,25 @@
+"""
+Shared pytest fixtures for the hardware test scripts
+"""
+import pytest
+
+
+@pytest.fixture(scope="session")
+def shared_camera():
+    """One warmed-up camera for every test, so the device is opened only once"""
+    # Imported here so machines without OpenCV still collect the other tests
+    pytest.importorskip("cv2")
+    from camera import Camera
+    from config import PREVIEW_WIDTH, PREVIEW_HEIGHT
+    
+    camera = Camera(
+        show_preview=True,
+        preview_width=PREVIEW_WIDTH,
+        preview_height=PREVIEW_HEIGHT
+    )
+    
+    if not camera.start():
+        pytest.skip("Camera not available")
+    
+    yield camera
+    camera.stop()
@@ -0,0 +1,17 @@
+"""
+Fast JSON encoding for the Ollama test scripts
+Uses orjson when installed, otherwise the stdlib json module
+"""
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    # orjson is optional - fall back to the stdlib encoder
+    from json import loads as json_loads
+    from json import dumps as _json_dumps
+
+    def json_dumps(obj):
+        """Encode obj as UTF-8 JSON bytes, like orjson.dumps"""
+        return _json_dumps(obj).encode('utf-8')
+
+# json_dumps returns bytes, so requests needs the content type spelled out
+JSON_HEADERS = {"Content-Type": "application/json"}
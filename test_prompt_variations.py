@@ -4,6 +4,8 @@ Test different prompt variations to find what works best with SmolLM2
 import requests
 import time
 
+from ollama_json import json_dumps, json_loads, JSON_HEADERS
+
 OLLAMA_URL = "http://localhost:11434"
 MODEL = "smollm2:1.7b"
 
@@ -59,8 +61,23 @@ I notice""",
 My internal reaction:"""
 }
 
+def _metrics(text, result=None):
+    """Build a response record with Ollama's token counts and timings"""
+    result = result or {}
+    return {
+        'text': text,
+        'prompt_tokens': result.get('prompt_eval_count', 0),
+        'gen_tokens': result.get('eval_count', 0),
+        'prompt_s': result.get('prompt_eval_duration', 0) / 1e9,  # ns -> s
+        'gen_s': result.get('eval_duration', 0) / 1e9
+    }
+
+def _tokens_per_second(tokens, seconds):
+    """Throughput in tokens/s, or 0 when Ollama reported no timing"""
+    return tokens / seconds if seconds > 0 else 0.0
+
 def query_model(prompt):
-    """Query SmolLM2 with a prompt"""
+    """Query SmolLM2 with a prompt, returning text plus inference metrics"""
     try:
         data = {
             "model": MODEL,
@@ -75,18 +92,19 @@ def query_model(prompt):
         
         response = requests.post(
             f"{OLLAMA_URL}/api/generate",
-            json=data,
+            data=json_dumps(data),
+            headers=JSON_HEADERS,
             timeout=30
         )
         
         if response.status_code == 200:
-            result = response.json()
-            return result.get('response', '').strip()
+            result = json_loads(response.content)
+            return _metrics(result.get('response', '').strip(), result)
         else:
-            return f"ERROR: {response.status_code}"
+            return _metrics(f"ERROR: {response.status_code}")
             
     except Exception as e:
-        return f"ERROR: {e}"
+        return _metrics(f"ERROR: {e}")
 
 def test_all_prompts():
     """Test all prompt variations"""
@@ -106,7 +124,10 @@ def test_all_prompts():
         print("-" * 80)
         
         print("\nQuerying model...")
-        response = query_model(prompt)
+        metrics = query_model(prompt)
+        response = metrics['text']
+        prompt_tps = _tokens_per_second(metrics['prompt_tokens'], metrics['prompt_s'])
+        gen_tps = _tokens_per_second(metrics['gen_tokens'], metrics['gen_s'])
         
         print("\nRESPONSE:")
         print("-" * 80)
@@ -132,13 +153,18 @@ def test_all_prompts():
         else: analysis.append("✗ Conversational")
         
         print(f"\nANALYSIS: {' | '.join(analysis)} | Score: {score}/7")
+        print(f"METRICS: {metrics['prompt_tokens']} prompt tokens @ {prompt_tps:.1f} tok/s | "
+              f"{metrics['gen_tokens']} generated @ {gen_tps:.1f} tok/s")
         
         results[name] = {
             'response': response,
             'score': score,
             'first_person': is_first_person,
             'not_meta': not is_meta,
-            'not_conversational': not is_conversational
+            'not_conversational': not is_conversational,
+            'prompt_tokens': metrics['prompt_tokens'],
+            'prompt_tps': prompt_tps,
+            'gen_tps': gen_tps
         }
         
         time.sleep(0.5)  # Brief pause between tests
@@ -151,7 +177,9 @@ def test_all_prompts():
     ranked = sorted(results.items(), key=lambda x: x[1]['score'], reverse=True)
     
     for i, (name, data) in enumerate(ranked, 1):
-        print(f"{i}. {name:30s} Score: {data['score']}/7")
+        print(f"{i}. {name:30s} Score: {data['score']}/7 | "
+              f"prompt {data['prompt_tokens']} tok @ {data['prompt_tps']:.1f} tok/s | "
+              f"gen {data['gen_tps']:.1f} tok/s")
         print(f"   Response: {data['response'][:80]}{'...' if len(data['response']) > 80 else ''}")
         print()
     
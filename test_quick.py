@@ -3,6 +3,8 @@ Quick test of top 5 prompt variations
 """
 import requests
 
+from ollama_json import json_dumps, json_loads, JSON_HEADERS
+
 OLLAMA_URL = "http://localhost:11434"
 MODEL = "smollm2:1.7b"
 
@@ -46,9 +48,9 @@ def query_model(prompt):
                 "num_predict": 50
             }
         }
-        response = requests.post(f"{OLLAMA_URL}/api/generate", json=data, timeout=30)
+        response = requests.post(f"{OLLAMA_URL}/api/generate", data=json_dumps(data), headers=JSON_HEADERS, timeout=30)
         if response.status_code == 200:
-            return response.json().get('response', '').strip()
+            return json_loads(response.content).get('response', '').strip()
         return f"ERROR: {response.status_code}"
     except Exception as e:
         return f"ERROR: {e}"
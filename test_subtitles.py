@@ -7,20 +7,12 @@ from camera import Camera
 from config import SHOW_CAMERA_PREVIEW, PREVIEW_WIDTH, PREVIEW_HEIGHT
 
 
-def test_subtitle_system():
+def test_subtitle_system(shared_camera):
     """Test subtitle overlay with sample AI responses"""
     print("🎬 Testing AI subtitle overlay system...")
     
-    # Initialize camera with subtitle capability
-    camera = Camera(
-        show_preview=True,
-        preview_width=PREVIEW_WIDTH,
-        preview_height=PREVIEW_HEIGHT
-    )
-    
-    if not camera.start():
-        print("❌ Failed to start camera")
-        return False
+    # Camera is opened once by the caller and shared between tests
+    camera = shared_camera
     
     # Sample AI inner monologue captions - mix of short and long to test live captioning style
     sample_captions = [
@@ -98,11 +90,24 @@ def test_subtitle_system():
         print("\n🛑 Test interrupted")
     
     finally:
-        camera.stop()
+        cv2.destroyAllWindows()
         print("✅ Subtitle test complete")
     
     return True
 
 
 if __name__ == "__main__":
-    test_subtitle_system()
\ No newline at end of file
+    # Standalone run: open the camera here instead of via the pytest fixture
+    camera = Camera(
+        show_preview=True,
+        preview_width=PREVIEW_WIDTH,
+        preview_height=PREVIEW_HEIGHT
+    )
+    
+    if camera.start():
+        try:
+            test_subtitle_system(camera)
+        finally:
+            camera.stop()
+    else:
+        print("❌ Failed to start camera")
\ No newline at end of file
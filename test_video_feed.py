@@ -7,19 +7,12 @@ from camera import Camera
 from config import SHOW_CAMERA_PREVIEW, PREVIEW_WIDTH, PREVIEW_HEIGHT
 
 
-def test_continuous_video():
+def test_continuous_video(shared_camera):
     """Test that camera shows smooth continuous video"""
     print("📹 Testing continuous video feed...")
     
-    camera = Camera(
-        show_preview=True,
-        preview_width=PREVIEW_WIDTH,
-        preview_height=PREVIEW_HEIGHT
-    )
-    
-    if not camera.start():
-        print("❌ Failed to start camera")
-        return False
+    # Camera is opened once by the caller and shared between tests
+    camera = shared_camera
     
     print("🎥 Showing continuous video feed...")
     print("📺 Should see smooth real-time video (not still frames)")
@@ -55,7 +48,7 @@ def test_continuous_video():
         print("\n🛑 Test interrupted")
     
     finally:
-        camera.stop()
+        cv2.destroyAllWindows()
         elapsed = time.time() - start_time
         avg_fps = frame_count / elapsed if elapsed > 0 else 0
         print(f"✅ Test complete - Avg FPS: {avg_fps:.1f}")
@@ -64,4 +57,17 @@ def test_continuous_video():
 
 
 if __name__ == "__main__":
-    test_continuous_video()
\ No newline at end of file
+    # Standalone run: open the camera here instead of via the pytest fixture
+    camera = Camera(
+        show_preview=True,
+        preview_width=PREVIEW_WIDTH,
+        preview_height=PREVIEW_HEIGHT
+    )
+    
+    if camera.start():
+        try:
+            test_continuous_video(camera)
+        finally:
+            camera.stop()
+    else:
+        print("❌ Failed to start camera")
\ No newline at end of file
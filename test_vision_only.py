@@ -1,10 +1,11 @@
 """Test vision model in isolation"""
 import cv2
 import requests
-import json
 import base64
 from config import OLLAMA_BASE_URL, OLLAMA_MODEL
 
+from ollama_json import json_dumps, json_loads, JSON_HEADERS
+
 # Capture a frame
 cap = cv2.VideoCapture(0)
 ret, frame = cap.read()
@@ -52,12 +53,13 @@ payload = {
 try:
     response = requests.post(
         f"{OLLAMA_BASE_URL}/api/chat",
-        json=payload,
+        data=json_dumps(payload),
+        headers=JSON_HEADERS,
         timeout=60
     )
     
     if response.status_code == 200:
-        result = response.json()
+        result = json_loads(response.content)
         vision_output = result['message']['content'].strip()
         print(f"\n✅ Vision model output:\n{vision_output}\n")
     else:
@@ -1,7 +1,6 @@
 """
 Test whisper mode vs normal voice
 """
-import time
 from voice import VoiceSystem
 
 def test_whisper():
@@ -27,7 +26,7 @@ def test_whisper():
     print("   Speaking...")
     voice.set_whisper_mode(False)
     voice.speak(test_text)
-    time.sleep(8)
+    voice.wait_until_idle(timeout=15)
     
     print()
     
@@ -37,7 +36,7 @@ def test_whisper():
     print("   Speaking...")
     voice.set_whisper_mode(True)
     voice.speak(test_text)
-    time.sleep(10)
+    voice.wait_until_idle(timeout=15)
     
     print()
     
@@ -55,7 +54,7 @@ def test_whisper():
         print(f"   {description}: The room is very quiet.")
         voice.set_speech_rate(rate)
         voice.speak("The room is very quiet.")
-        time.sleep(5)
+        voice.wait_until_idle(timeout=15)
     
     print()
     
@@ -65,15 +64,15 @@ def test_whisper():
     
     print("   Normal: I'm observing the space around me.")
     voice.speak("I'm observing the space around me.", whisper=False)
-    time.sleep(5)
+    voice.wait_until_idle(timeout=15)
     
     print("   Whisper override: But something feels different now.")
     voice.speak("But something feels different now.", whisper=True)
-    time.sleep(6)
+    voice.wait_until_idle(timeout=15)
     
     print()
     print("⏳ Waiting for all speech to complete...")
-    time.sleep(5)
+    voice.wait_until_idle(timeout=15)
     
     voice.stop()
     
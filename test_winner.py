@@ -2,10 +2,21 @@
 Test the WINNER prompt variation
 """
 import requests
+from requests.adapters import HTTPAdapter
+
+from ollama_json import json_dumps, json_loads, JSON_HEADERS
 
 OLLAMA_URL = "http://localhost:11434"
 MODEL = "smollm2:1.7b"
 
+# The first-person check only looks at this many characters, so generation
+# is cut off as soon as they have streamed in
+EARLY_STOP_CHARS = 80
+
+# One keep-alive connection to Ollama shared by every query
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
 VISUAL_DESC = "A person with dark hair wearing a black hoodie sits at a desk. Behind them is a poster with circular patterns. A fish tank is visible on the left side of the room."
 
 # THE WINNER from quick test
@@ -20,17 +31,29 @@ def query_model(prompt, temp=0.8):
         data = {
             "model": MODEL,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
             "options": {
                 "temperature": temp,
                 "top_p": 0.9,
                 "num_predict": 50
             }
         }
-        response = requests.post(f"{OLLAMA_URL}/api/generate", json=data, timeout=30)
-        if response.status_code == 200:
-            return response.json().get('response', '').strip()
-        return f"ERROR: {response.status_code}"
+        response = SESSION.post(f"{OLLAMA_URL}/api/generate", data=json_dumps(data), headers=JSON_HEADERS,
+                                timeout=30, stream=True)
+        with response:
+            if response.status_code != 200:
+                return f"ERROR: {response.status_code}"
+            
+            # Each line is one JSON chunk; leaving the block closes the stream
+            text = ""
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json_loads(line)
+                text += chunk.get('response', '')
+                if chunk.get('done') or len(text) >= EARLY_STOP_CHARS:
+                    break
+            return text.strip()
     except Exception as e:
         return f"ERROR: {e}"
 
@@ -46,7 +69,7 @@ for i in range(3):
     print(response)
     
     # Analysis
-    first_50 = response.lower()[:80]
+    first_50 = response.lower()[:EARLY_STOP_CHARS]
     is_first = any(word in first_50 for word in ['i ', "i'm", "i see", "i notice", "i think", "i observe", "i am"])
     is_meta = any(phrase in response.lower() for phrase in ['the image', 'you are describing', 'your description', 'as an ai', 'i cannot', 'chatbot', 'you provided'])
     
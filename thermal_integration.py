@@ -7,6 +7,8 @@ import threading
 import queue
 import time
 import logging
+from collections import deque
+from difflib import SequenceMatcher
 from typing import Optional
 
 try:
@@ -16,29 +18,59 @@ except ImportError as e:
     print(f"⚠️ Thermal printer not available: {e}")
     THERMAL_AVAILABLE = False
 
+log = logging.getLogger("thermal")
+
+# Most subtitles the worker will combine into one print job
+MAX_PRINT_BATCH = 8
+
+# Most subtitles waiting to print; beyond this the oldest is dropped so
+# the printer stays close to the live speech
+MAX_PRINT_QUEUE = 16
+
+# Recent subtitles remembered for duplicate detection, and how similar
+# a subtitle must be to the last one to count as a repeat
+DEDUP_WINDOW = 4
+DEDUP_SIMILARITY = 0.9
+
+# Seconds between reconnection attempts while the printer is lost; the
+# wait doubles after each failure up to the maximum
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_MAX = 30.0
+
+# Queued by stop() to wake the print worker and end it
+_STOP = object()
+
 class ThermalSubtitlePrinter:
     """Handles thermal printing of AI subtitles with rhythmic timing"""
     
     def __init__(self, enabled=True):
         self.enabled = enabled and THERMAL_AVAILABLE
         self.printer = None
-        self.print_queue = queue.Queue()
+        self.print_queue = queue.Queue(maxsize=MAX_PRINT_QUEUE)
         self.print_thread = None
         self.running = False
+        self._stop_event = threading.Event()
         self.connected = False
+        self._last_enqueued_text = None
+        self._recent_texts = deque(maxlen=DEDUP_WINDOW)
         
         if self.enabled:
             self._clear_queue()  # Clear any residual items from previous sessions
             self._initialize_printer()
     
-    def _clear_queue(self):
-        """Clear both software queue and Windows print spooler queue"""
-        # Clear in-memory queue
+    def _drain_queue(self):
+        """Discard everything waiting in the in-memory print queue"""
         while not self.print_queue.empty():
             try:
                 self.print_queue.get_nowait()
             except queue.Empty:
                 break
+            self.print_queue.task_done()
+    
+    def _clear_queue(self):
+        """Clear both software queue and Windows print spooler queue"""
+        # Clear in-memory queue
+        self._drain_queue()
         
         # Re-enabled: Issue identified as Windows spooler, not our code
         
@@ -66,16 +98,7 @@ class ThermalSubtitlePrinter:
         # Re-enabled: Issue confirmed as Windows spooler persistence
         
         try:
-            self.printer = DiagonalTiltedPrinter()
-            # Import printer name from config if available
-            try:
-                from config import THERMAL_PRINTER_NAME
-                printer_name = THERMAL_PRINTER_NAME
-            except ImportError:
-                printer_name = "XP-80"  # Default fallback
-            
-            self.connected = self.printer.connect(printer_name)
-            if self.connected:
+            if self._connect_printer():
                 # Clear any residual data in printer buffer
                 self.printer.clear_printer_buffer()
                 print("🖨️ Thermal printer connected and ready for subtitles")
@@ -87,6 +110,24 @@ class ThermalSubtitlePrinter:
             self.enabled = False
             self.connected = False
     
+    def _connect_printer(self) -> bool:
+        """Create a printer configured from config, connect it, return success"""
+        self.printer = DiagonalTiltedPrinter()
+        # Import printer name from config if available
+        try:
+            from config import THERMAL_PRINTER_NAME
+            printer_name = THERMAL_PRINTER_NAME
+        except ImportError:
+            printer_name = "XP-80"  # Default fallback
+        try:
+            from config import THERMAL_FEED_PACING
+            self.printer.feed_pacing = THERMAL_FEED_PACING
+        except ImportError:
+            pass
+        
+        self.connected = self.printer.connect(printer_name)
+        return self.connected
+    
     def start(self):
         """Start the thermal printing thread"""
         if not self.enabled:
@@ -97,6 +138,7 @@ class ThermalSubtitlePrinter:
         self._clear_queue()
         
         self.running = True
+        self._stop_event.clear()
         self.print_thread = threading.Thread(target=self._print_worker, daemon=True)
         self.print_thread.start()
         print("🖨️ Thermal subtitle printer thread started")
@@ -104,93 +146,178 @@ class ThermalSubtitlePrinter:
     def stop(self):
         """Stop the thermal printing thread"""
         self.running = False
+        self._stop_event.set()
         if self.print_thread:
+            # Pending subtitles are abandoned and the subtitle being printed
+            # is cut short; the sentinel wakes the worker
+            self._drain_queue()
+            if self.printer:
+                self.printer.cancel()
+            self.print_queue.put(_STOP)
             self.print_thread.join(timeout=2.0)
         if self.printer and self.connected:
             self.printer.close()
             print("🖨️ Thermal printer disconnected")
     
+    def _is_duplicate(self, subtitle_text: str) -> bool:
+        """Check a subtitle against recent ones and remember it if it is new.
+        
+        Retries and caption refreshes can resend the same (or nearly the
+        same) text; skipping it here saves a whole rhythmic print.
+        """
+        norm = " ".join(subtitle_text.split()).lower()
+        if norm in self._recent_texts:
+            return True
+        last = self._last_enqueued_text
+        if last is not None and SequenceMatcher(None, last, norm).ratio() > DEDUP_SIMILARITY:
+            return True
+        self._recent_texts.append(norm)
+        self._last_enqueued_text = norm
+        return False
+    
     def print_subtitle(self, subtitle_text: str):
         """Queue a subtitle for thermal printing with rhythmic timing"""
-        if not self.enabled or not self.connected:
+        # Subtitles still queue while the worker is reconnecting; the queue
+        # is bounded and drops the oldest, so they cannot pile up
+        if not self.enabled or not self.printer or self._stop_event.is_set():
             return
             
         if not subtitle_text or not subtitle_text.strip():
             return
             
-        # Add timestamp and queue for printing
+        if self._is_duplicate(subtitle_text):
+            log.debug("Skipping repeated subtitle: %s", subtitle_text[:30])
+            return
+            
+        # Add timestamp and queue for printing. The ESC/POS bytes and pauses
+        # are built here so the print worker only does printer I/O.
         timestamp = time.strftime("%H:%M:%S")
+        text = subtitle_text.strip()
         print_item = {
-            'text': subtitle_text.strip(),
+            'text': text,
+            'plan': self.printer.prepare_subtitle(text),
             'timestamp': timestamp,
             'type': 'subtitle'
         }
         
         try:
             self.print_queue.put_nowait(print_item)
-            print(f"📝 Queued for thermal print: '{subtitle_text[:30]}{'...' if len(subtitle_text) > 30 else ''}'")
         except queue.Full:
-            print("⚠️ Thermal print queue full - skipping subtitle")
+            # Drop the oldest subtitle to keep printing close to real time
+            try:
+                dropped = self.print_queue.get_nowait()
+                self.print_queue.task_done()
+            except queue.Empty:
+                dropped = None
+            if dropped is _STOP:
+                # stop() got in first - keep its sentinel and skip this subtitle
+                self.print_queue.put_nowait(_STOP)
+                return
+            if dropped is not None:
+                log.warning("Thermal print queue full - dropped: %s", dropped['text'][:30])
+            try:
+                self.print_queue.put_nowait(print_item)
+            except queue.Full:
+                log.warning("Thermal print queue full - skipping subtitle")
+                return
+        
+        log.debug("Queued thermal print: %s", subtitle_text[:30])
     
     def _print_worker(self):
         """Worker thread that handles the actual thermal printing"""
         print("🖨️ Thermal print worker thread active")
+        reconnect_delay = RECONNECT_DELAY
         
-        while self.running:
+        while not self._stop_event.is_set():
+            # A failed print marks the connection lost - keep reconnecting,
+            # backing off between attempts, until it comes back or we stop
+            if not self._check_connection():
+                if not self._attempt_reconnection():
+                    if self._stop_event.wait(reconnect_delay):
+                        break
+                    reconnect_delay = min(reconnect_delay * 2, RECONNECT_DELAY_MAX)
+                    continue
+                reconnect_delay = RECONNECT_DELAY
+            
             try:
-                # Wait for next print job (shorter timeout for faster response)
-                print_item = self.print_queue.get(timeout=0.1)
+                # Sleep until a print job (or the stop sentinel) arrives
+                print_item = self.print_queue.get()
+                if print_item is _STOP:
+                    self.print_queue.task_done()
+                    break
                 
-                if print_item['type'] == 'subtitle':
-                    self._print_subtitle_rhythmic(print_item)
+                # Subtitles arriving in a burst are drained and printed as one
+                # job; batch size follows how far the queue has backed up
+                max_batch = min(MAX_PRINT_BATCH, self.print_queue.qsize() + 1)
+                batch = [print_item]
+                while len(batch) < max_batch:
+                    try:
+                        next_item = self.print_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if next_item is _STOP:
+                        self.print_queue.task_done()
+                        self._stop_event.set()
+                        break
+                    batch.append(next_item)
                 
-                self.print_queue.task_done()
+                subtitles = [item for item in batch if item['type'] == 'subtitle']
+                if subtitles:
+                    self._print_subtitles_batched(subtitles)
+                
+                for _ in batch:
+                    self.print_queue.task_done()
                 
-            except queue.Empty:
-                continue
             except Exception as e:
-                print(f"🖨️ Thermal print error: {e}")
-                # Try to reconnect if connection lost
-                if not self._check_connection():
-                    self._attempt_reconnection()
+                log.error("Thermal print error: %s", e)
     
     def _print_subtitle_rhythmic(self, print_item):
         """Print subtitle with rhythmic, syllable-based timing"""
         text = print_item['text']
         timestamp = print_item['timestamp']
         
-        print(f"🖨️ Thermal printing: [{timestamp}] {text}")
+        log.debug("Thermal printing: [%s] %s", timestamp, text)
         
         try:
             # Print with rhythmic diagonal burst (no timestamp header)
-            self.printer.syllable_diagonal_burst(text)
+            self.printer.print_plans([print_item['plan']])
             
         except Exception as e:
-            print(f"🖨️ Error printing subtitle: {e}")
+            log.error("Error printing subtitle: %s", e)
+            self.connected = False
     
-    def _check_connection(self) -> bool:
-        """Check if printer connection is still active"""
+    def _print_subtitles_batched(self, print_items):
+        """Print several queued subtitles in a single print job"""
+        if len(print_items) == 1:
+            self._print_subtitle_rhythmic(print_items[0])
+            return
+        
+        if log.isEnabledFor(logging.DEBUG):
+            for print_item in print_items:
+                log.debug("Thermal printing: [%s] %s", print_item['timestamp'], print_item['text'])
+            log.debug("Batched %d subtitles into one print job", len(print_items))
+        
         try:
-            if not self.printer or not self.connected:
-                return False
-            # Simple test - try to send empty command
-            self.printer.send_text("")
-            return True
-        except:
+            self.printer.print_plans([item['plan'] for item in print_items])
+            
+        except Exception as e:
+            log.error("Error printing subtitles: %s", e)
             self.connected = False
-            return False
     
-    def _attempt_reconnection(self):
-        """Try to reconnect to thermal printer"""
+    def _check_connection(self) -> bool:
+        """Check if printer connection is still active (state only, no I/O)"""
+        # Sending a probe job here would race with the print worker's job;
+        # print failures clear self.connected instead
+        return self.printer is not None and self.connected
+    
+    def _attempt_reconnection(self) -> bool:
+        """Try to reconnect to thermal printer; returns True when connected"""
         print("🖨️ Attempting thermal printer reconnection...")
         try:
             if self.printer:
                 self.printer.close()
             
-            self.printer = DiagonalTiltedPrinter()
-            self.connected = self.printer.connect()
-            
-            if self.connected:
+            if self._connect_printer():
                 print("🖨️ Thermal printer reconnected successfully")
             else:
                 print("⚠️ Thermal printer reconnection failed")
@@ -198,6 +325,7 @@ class ThermalSubtitlePrinter:
         except Exception as e:
             print(f"⚠️ Reconnection error: {e}")
             self.connected = False
+        return self.connected
 
 
 class MockThermalPrinter:
@@ -9,44 +9,129 @@ import time
 import syllapy
 import re
 import random
+import threading
+from functools import lru_cache
+
+_WORD_RE = re.compile(r'\b\w+\b')
+_VOWEL_GROUP_RE = re.compile(r'[aeiouy]+')
+
+# Pause after a word, keyed by syllable bucket (3 = three or more):
+# (pause choices in seconds, weights) - like real typewriter rhythm patterns
+_PAUSE_TABLES = {
+    1: ([0.1, 0.4], [0.7, 0.3]),                # Short words: quick breath / brief thinking
+    2: ([0.2, 0.6], [0.5, 0.5]),                # Medium words: normal pause / thinking
+    3: ([0.3, 0.8, 1.2], [0.3, 0.49, 0.21]),    # Complex words: brief / thinking / contemplation
+}
+
+
+def _sample_pauses(buckets):
+    """Draw one pause per word, sampling each bucket in a single choices() call."""
+    draws = {}
+    for bucket in set(buckets):
+        choices, weights = _PAUSE_TABLES[bucket]
+        draws[bucket] = iter(random.choices(choices, weights, k=buckets.count(bucket)))
+    return [next(draws[bucket]) for bucket in buckets]
+
+
+def _fast_syllables(word):
+    """Vowel-group syllable estimate - accurate enough for print pacing."""
+    if len(word) <= 3:
+        return 1
+    return max(1, len(_VOWEL_GROUP_RE.findall(word)))
+
+
+def _syllables(word):
+    """Syllable count for a word; short words skip syllapy entirely."""
+    if len(word) <= 3:
+        return 1
+    return _counted_syllables(word)
+
+
+@lru_cache(maxsize=4096)
+def _counted_syllables(word):
+    """syllapy count, cached since subtitle words repeat a lot."""
+    try:
+        return syllapy.count(word)
+    except Exception:
+        return _fast_syllables(word)
+
 
 class DiagonalTiltedPrinter:
     def __init__(self):
         self.printer_handle = None
-        self.ESC = '\x1b'
-        self.GS = '\x1d'
+        self._job_open = False  # True while a subtitle-wide RAW job is open
+        # Serializes all spooler calls on the shared handle. Re-entrant so the
+        # job helpers can be nested inside a subtitle-wide job.
+        self._lock = threading.RLock()
+        # Set by close() so a paced job stops sleeping and ends early instead
+        # of holding the lock until its last word
+        self._cancel = threading.Event()
+        # ESC/POS commands are kept as bytes so nothing is encoded per letter
+        self.ESC = b'\x1b'
+        self.GS = b'\x1d'
         
         # Text rotation commands
-        self.ROTATE_90_ON = self.ESC + 'V\x01'     # Rotate 90 degrees
-        self.ROTATE_OFF = self.ESC + 'V\x00'       # Normal orientation
+        self.ROTATE_90_ON = self.ESC + b'V\x01'     # Rotate 90 degrees
+        self.ROTATE_OFF = self.ESC + b'V\x00'       # Normal orientation
         
         # Size commands
-        self.DOUBLE_HEIGHT = self.GS + '!\x01'     # Double height
-        self.DOUBLE_WIDTH = self.GS + '!\x10'      # Double width  
-        self.DOUBLE_BOTH = self.GS + '!\x11'       # Both directions
-        self.TRIPLE_HEIGHT = self.GS + '!\x02'     # Triple height
-        self.QUAD_HEIGHT = self.GS + '!\x03'       # Quadruple height
-        self.NORMAL_SIZE = self.GS + '!\x00'       # Reset to normal
-        self.BIG_SIZE = self.GS + '!\x11'          # Try double both for bigger text
+        self.DOUBLE_HEIGHT = self.GS + b'!\x01'     # Double height
+        self.DOUBLE_WIDTH = self.GS + b'!\x10'      # Double width  
+        self.DOUBLE_BOTH = self.GS + b'!\x11'       # Both directions
+        self.TRIPLE_HEIGHT = self.GS + b'!\x02'     # Triple height
+        self.QUAD_HEIGHT = self.GS + b'!\x03'       # Quadruple height
+        self.NORMAL_SIZE = self.GS + b'!\x00'       # Reset to normal
+        self.BIG_SIZE = self.GS + b'!\x11'          # Try double both for bigger text
         
         # Alignment
-        self.ALIGN_LEFT = self.ESC + 'a\x00'
-        self.ALIGN_CENTER = self.ESC + 'a\x01' 
-        self.ALIGN_RIGHT = self.ESC + 'a\x02'
+        self.ALIGN_LEFT = self.ESC + b'a\x00'
+        self.ALIGN_CENTER = self.ESC + b'a\x01' 
+        self.ALIGN_RIGHT = self.ESC + b'a\x02'
         
         # Line spacing
-        self.LINE_SPACE_DEFAULT = self.ESC + '2'   # Default line spacing
-        self.LINE_SPACE_TIGHT = self.ESC + '0'     # Minimum line spacing
+        self.LINE_SPACE_DEFAULT = self.ESC + b'2'   # Default line spacing
+        self.LINE_SPACE_TIGHT = self.ESC + b'0'     # Minimum line spacing
         
         # Emphasis
-        self.BOLD_ON = self.ESC + 'E\x01'
-        self.BOLD_OFF = self.ESC + 'E\x00'
-        self.UNDERLINE_ON = self.ESC + '-\x01'
-        self.UNDERLINE_OFF = self.ESC + '-\x00'
+        self.BOLD_ON = self.ESC + b'E\x01'
+        self.BOLD_OFF = self.ESC + b'E\x00'
+        self.UNDERLINE_ON = self.ESC + b'-\x01'
+        self.UNDERLINE_OFF = self.ESC + b'-\x00'
         
         # Printer reset commands
-        self.PRINTER_RESET = self.ESC + '@'        # Initialize printer
-        self.BUFFER_CLEAR = self.ESC + 'c'         # Clear print buffer
+        self.PRINTER_RESET = self.ESC + b'@'        # Initialize printer
+        self.BUFFER_CLEAR = self.ESC + b'c'         # Clear print buffer
+        
+        # Paper-feed pacing (ESC J n): short pauses become blank feed on the
+        # printer instead of host sleeps. Off by default because every pause
+        # then shows up as blank paper between words.
+        self.feed_pacing = False
+        self.feed_dots_per_second = 160     # Blank dots fed per second of pause
+        self.feed_pacing_max_pause = 1.0    # Longer pauses still sleep on the host
+        
+        # (prefix, suffix) bytes wrapped around each letter, per style
+        # Subtle style variations - all larger with minor spacing differences
+        tilted_off = b"\n" + self.ROTATE_OFF + self.NORMAL_SIZE
+        self._style_table = {
+            # Use double both for visible size increase, tighter spacing
+            "COMPACT_TILTED": (self.ROTATE_90_ON + self.BIG_SIZE + self.set_custom_line_spacing(18),
+                               tilted_off),
+            # Medium spacing
+            "MEDIUM_TILTED": (self.ROTATE_90_ON + self.BIG_SIZE + self.set_custom_line_spacing(22),
+                              tilted_off),
+            # Slightly wider
+            "RELAXED_TILTED": (self.ROTATE_90_ON + self.BIG_SIZE + self.set_custom_line_spacing(26),
+                               tilted_off),
+            # More spaced
+            "SPACED_TILTED": (self.ROTATE_90_ON + self.BIG_SIZE + self.set_custom_line_spacing(30),
+                              tilted_off),
+            # Bold with medium spacing
+            "BOLD_TILTED": (self.ROTATE_90_ON + self.BOLD_ON + self.BIG_SIZE + self.set_custom_line_spacing(24),
+                            b"\n" + self.BOLD_OFF + self.ROTATE_OFF + self.NORMAL_SIZE),
+            # Use bigger size for all
+            "NORMAL_TILTED": (self.ROTATE_90_ON + self.BIG_SIZE + self.set_custom_line_spacing(20),
+                              tilted_off),
+        }
     
     def clear_printer_buffer(self):
         """Clear any residual data in printer buffer"""
@@ -62,6 +147,7 @@ class DiagonalTiltedPrinter:
         return False
     
     def connect(self, printer_name="XP-80"):
+        self._cancel.clear()
         try:
             self.printer_handle = win32print.OpenPrinter(printer_name)
             print(f"✅ Connected to {printer_name}")
@@ -70,111 +156,161 @@ class DiagonalTiltedPrinter:
             print(f"❌ Failed to connect to {printer_name}: {e}")
             return False
     
-    def send_text(self, text_cmd):
-        """Send text command as individual print job."""
-        try:
-            job_id = win32print.StartDocPrinter(self.printer_handle, 1, ("Diagonal", None, "RAW"))
+    def _encode(self, cmd):
+        """Encode an ESC/POS command string for the RAW spooler."""
+        if isinstance(cmd, bytes):
+            return cmd
+        return cmd.encode('latin-1', errors='replace')
+    
+    def _begin_job(self, name="Subtitle"):
+        """Open a RAW document/page that following writes go into."""
+        with self._lock:
+            win32print.StartDocPrinter(self.printer_handle, 1, (name, None, "RAW"))
             win32print.StartPagePrinter(self.printer_handle)
-            win32print.WritePrinter(self.printer_handle, text_cmd.encode('latin-1', errors='replace'))
+            self._job_open = True
+    
+    def _raw_write(self, data):
+        """Write raw bytes into the currently open job."""
+        with self._lock:
+            win32print.WritePrinter(self.printer_handle, data)
+    
+    def _end_job(self):
+        """Close the RAW page/document opened by _begin_job."""
+        with self._lock:
+            self._job_open = False
             win32print.EndPagePrinter(self.printer_handle)
             win32print.EndDocPrinter(self.printer_handle)
+    
+    def _send_job(self, data, doc_name):
+        """Send raw bytes as one RAW print job, or into the open job if any."""
+        with self._lock:
+            if self._job_open:
+                self._raw_write(data)
+                return
+            self._begin_job(doc_name)
+            try:
+                self._raw_write(data)
+            finally:
+                self._end_job()
+    
+    def send_text(self, text_cmd):
+        """Send text command as individual print job."""
+        try:
+            self._send_job(self._encode(text_cmd), "Diagonal")
         except Exception as e:
             print(f"Print error: {e}")
     
     def set_custom_line_spacing(self, spacing):
         """Set custom line spacing (0-255)."""
-        return self.ESC + '3' + chr(spacing)
+        return self.ESC + b'3' + bytes([spacing])
+    
+    def _style_affixes(self, style):
+        """(prefix, suffix) bytes for a style; unknown styles print NORMAL_TILTED."""
+        return self._style_table.get(style) or self._style_table["NORMAL_TILTED"]
     
     def print_diagonal_letter(self, letter, style, delay=0.15):
-        """Print a single letter diagonally with individual motor burst."""
+        """Print a single letter diagonally with individual motor burst.
         
+        Kept for callers that want per-letter jobs; subtitle printing builds
+        whole words in _append_word instead.
+        """
         # Each letter gets its own complete print job - creates motor "tik" sound
-        # Subtle style variations - all larger with minor spacing differences
-        if style == "COMPACT_TILTED":
-            cmd = (self.ROTATE_90_ON + 
-                   self.BIG_SIZE +  # Use double both for visible size increase
-                   self.set_custom_line_spacing(18) +  # Tighter spacing
-                   letter.lower() + "\n" + 
-                   self.ROTATE_OFF + 
-                   self.NORMAL_SIZE)
-        
-        elif style == "MEDIUM_TILTED": 
-            cmd = (self.ROTATE_90_ON + 
-                   self.BIG_SIZE + 
-                   self.set_custom_line_spacing(22) +  # Medium spacing
-                   letter.lower() + "\n" + 
-                   self.ROTATE_OFF + 
-                   self.NORMAL_SIZE)
-        
-        elif style == "RELAXED_TILTED":
-            cmd = (self.ROTATE_90_ON + 
-                   self.BIG_SIZE + 
-                   self.set_custom_line_spacing(26) +  # Slightly wider
-                   letter.lower() + "\n" + 
-                   self.ROTATE_OFF + 
-                   self.NORMAL_SIZE)
-        
-        elif style == "SPACED_TILTED":
-            cmd = (self.ROTATE_90_ON + 
-                   self.BIG_SIZE + 
-                   self.set_custom_line_spacing(30) +  # More spaced
-                   letter.lower() + "\n" + 
-                   self.ROTATE_OFF + 
-                   self.NORMAL_SIZE)
-        
-        elif style == "BOLD_TILTED":
-            cmd = (self.ROTATE_90_ON + 
-                   self.BOLD_ON + 
-                   self.BIG_SIZE + 
-                   self.set_custom_line_spacing(24) +  # Bold with medium spacing
-                   letter.lower() + "\n" + 
-                   self.BOLD_OFF + 
-                   self.ROTATE_OFF + 
-                   self.NORMAL_SIZE)
-        
-        else:  # "NORMAL_TILTED"
-            cmd = (self.ROTATE_90_ON + 
-                   self.BIG_SIZE +  # Use bigger size for all
-                   self.set_custom_line_spacing(20) +
-                   letter.lower() + "\n" + 
-                   self.ROTATE_OFF + 
-                   self.NORMAL_SIZE)
-        
-        # CRITICAL: Each letter = separate print job = individual motor burst sound
-        self.send_individual_letter(cmd)
-        time.sleep(delay)
+        prefix, suffix = self._style_affixes(style)
+        self.send_individual_letter(prefix + self._encode(letter.lower()) + suffix)
+        if delay > 0:
+            time.sleep(delay)
     
     def send_individual_letter(self, cmd):
         """Send each letter as completely separate print job for motor burst sound."""
         try:
             # Each letter gets its own job - creates distinct "tik" motor sound
-            job_id = win32print.StartDocPrinter(self.printer_handle, 1, ("Letter", None, "RAW"))
-            win32print.StartPagePrinter(self.printer_handle)
-            win32print.WritePrinter(self.printer_handle, cmd.encode('latin-1', errors='replace'))
-            win32print.EndPagePrinter(self.printer_handle)
-            win32print.EndDocPrinter(self.printer_handle)
+            self._send_job(self._encode(cmd), "Letter")
             # No delay here - let the rhythm timing handle it
         except Exception as e:
             print(f"Tik error: {e}")
     
-    def print_word_diagonally(self, word, style, base_delay=0.0):
-        """Print entire word INSTANTLY - all rhythm comes from word pauses."""
-        
-        # Print ALL letters instantly in rapid succession
-        for letter in word.lower():
-            # NO delay between letters - true burst within word
-            self.print_diagonal_letter(letter, style, 0.0)
-
-        # ALL rhythm and meaning comes from pauses BETWEEN words
+    def feed_dots(self, dots):
+        """Feed paper by a number of dots (ESC J n, in steps of up to 255)."""
+        dots = max(0, int(dots))
+        cmd = bytearray()
+        while dots > 0:
+            step = min(255, dots)
+            cmd += self.ESC + b'J' + bytes([step])
+            dots -= step
+        return bytes(cmd)
+    
+    def _append_word(self, cmd_buf, word, style):
+        """Append the ESC/POS bytes for a whole word plus its line feed."""
+        # Letters within a word have no delay between them, so the whole
+        # word goes out as ONE write instead of one job per letter
+        # Letter bytes are inlined here - no per-letter method call
+        prefix, suffix = self._style_affixes(style)
+        append = cmd_buf.append
+        for letter in self._encode(word.lower()):
+            cmd_buf += prefix
+            append(letter)
+            cmd_buf += suffix
 
         # Minimal spacing between words - fastest possible
-        self.send_text("\n")  # Just one line - minimal delay
+        cmd_buf += b"\n"  # Just one line - minimal delay
+    
+    def _word_cmd(self, word, style):
+        """Build the ESC/POS bytes for a whole word plus its line feed."""
+        cmd_buf = bytearray()
+        self._append_word(cmd_buf, word, style)
+        return bytes(cmd_buf)
+    
+    def print_word_diagonally(self, word, style, base_delay=0.0):
+        """Print entire word INSTANTLY - all rhythm comes from word pauses."""
+        try:
+            self._send_job(self._word_cmd(word, style), "Word")
+        except Exception as e:
+            print(f"Word print error: {e}")
 
     def syllable_diagonal_burst(self, text):
-        """Print text with syllable-based diagonal styles."""
+        """Print text with syllable-based diagonal styles as one print job."""
+        self.print_subtitles([text])
+    
+    def print_subtitles(self, texts):
+        """Print several subtitles back to back inside a single print job."""
+        # Build every word's bytes and pause before touching the printer
+        self.print_plans([self.prepare_subtitle(text) for text in texts])
+    
+    def print_plans(self, plans):
+        """Print subtitles already built by prepare_subtitle in one print job."""
+        # Hold the handle for the whole job so no other write lands inside it
+        with self._lock:
+            self._begin_job("Subtitle")
+            try:
+                for plan in plans:
+                    if self._cancel.is_set():
+                        break
+                    self._emit_paced(plan)
+                    # Minimal finishing space
+                    self._raw_write(b"\n\n\n")
+            finally:
+                self._end_job()
+    
+    def _emit_paced(self, plan):
+        """Write each word blob and sleep once for the pause that follows it.
+        
+        Returns early if close() cancels the job mid-pause.
+        """
+        for word_bytes, pause in plan:
+            if self._cancel.is_set():
+                return
+            self._raw_write(word_bytes)
+            if pause > 0 and self._cancel.wait(pause):
+                return
+    
+    def prepare_subtitle(self, text):
+        """Turn text into a list of (word_bytes, post_pause_seconds) pairs.
+        
+        All words share one buffer; each word_bytes is a memoryview slice of
+        it, so a subtitle costs one allocation rather than one per word.
+        """
         
         # Focus on MEANINGFUL RHYTHM instead of pure speed
-        word_count = len(re.findall(r'\b\w+\b', text))
         
         # Meaningful rhythm patterns - instant letters, intentional pauses
         style_map = {
@@ -185,49 +321,42 @@ class DiagonalTiltedPrinter:
             5: ("BOLD_TILTED", 0.0),        # 5+ syllables = instant burst
         }
         
-        words = re.findall(r'\b\w+\b', text.lower())
+        words = _WORD_RE.findall(text.lower())
+        syllable_counts = [_syllables(word) for word in words]
         
-        for word in words:
-            try:
-                syllables = syllapy.count(word)
-            except:
-                syllables = 1
+        # Create realistic typing patterns based on word complexity
+        pauses = _sample_pauses([min(max(syllables, 1), 3) for syllables in syllable_counts])
+        
+        cmd_buf = bytearray()
+        spans = []
+        
+        for word, syllables, pause in zip(words, syllable_counts, pauses):
             
             # Get style and timing for this syllable count
             style_info = style_map.get(syllables, ("NORMAL_TILTED", 0.2))
             style, speed = style_info
 
-            self.print_word_diagonally(word, style, speed)            # MEANINGFUL pauses - like real typewriter rhythm patterns
+            # MEANINGFUL pauses - like real typewriter rhythm patterns
+            # ALL rhythm and meaning comes from pauses BETWEEN words
             
-            # Create realistic typing patterns based on word complexity
-            if syllables == 1:  # Short words = quick transition
-                if random.random() < 0.7:  # 70% chance rapid continuation
-                    pause = 0.1  # Quick breath
-                else:
-                    pause = 0.4  # Brief thinking
-                    
-            elif syllables == 2:  # Medium words = normal rhythm
-                if random.random() < 0.5:  # 50/50 chance
-                    pause = 0.2  # Normal typing pause
-                else:
-                    pause = 0.6  # Thinking pause
-                    
-            elif syllables >= 3:  # Complex words = more thinking
-                if random.random() < 0.3:  # 30% chance quick
-                    pause = 0.3  # Brief pause
-                elif random.random() < 0.7:  # 40% chance thinking  
-                    pause = 0.8  # Thinking about next word
-                else:
-                    pause = 1.2  # Long contemplation
-                    
             # Add sentence structure awareness
             if word.endswith(('.', '!', '?')):
                 pause += 1.0  # Sentence end = longer pause
             elif word.endswith(','):
                 pause += 0.5  # Comma = medium pause
 
-            time.sleep(pause)        # Minimal finishing space 
-        self.send_text("\n\n\n")
+            start = len(cmd_buf)
+            self._append_word(cmd_buf, word, style)
+            
+            # Let the printer pace short pauses itself with a paper feed
+            if self.feed_pacing and pause <= self.feed_pacing_max_pause:
+                cmd_buf += self.feed_dots(pause * self.feed_dots_per_second)
+                pause = 0.0
+            
+            spans.append((start, len(cmd_buf), pause))
+        
+        view = memoryview(cmd_buf)
+        return [(view[start:end], pause) for start, end, pause in spans]
     
     def diagonal_showcase(self):
         """Showcase all diagonal tilted styles."""
@@ -250,9 +379,17 @@ class DiagonalTiltedPrinter:
         # Final separator
         self.send_text("\n" + "="*20 + "\nDIAGONAL SHOWCASE COMPLETE\n\n")
     
+    def cancel(self):
+        """Cut short the paced print job in progress, if any."""
+        self._cancel.set()
+    
     def close(self):
-        if self.printer_handle:
-            win32print.ClosePrinter(self.printer_handle)
+        # Cut short any paced job first so the lock frees within one write
+        self.cancel()
+        with self._lock:
+            if self.printer_handle:
+                win32print.ClosePrinter(self.printer_handle)
+                self.printer_handle = None
 
 def main():
     print("=== Diagonal Tilted Thermal Printer ===")
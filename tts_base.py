@@ -0,0 +1,83 @@
+"""
+Shared plumbing for the text-to-speech engines
+Text cleaning, sentence splitting and the speech queue used by both
+VoiceSystem (Piper) and WindowsTTS (SAPI)
+"""
+import re
+import threading
+from collections import deque
+
+# Patterns stripped from text before it is spoken
+_RE_TS = re.compile(r'\[\d{2}:\d{2}:\d{2}\]')
+_RE_DEBUG = re.compile(r'\[(?:DEBUG|System|Tone)[^\]]*\]')
+
+# Emoji and special characters deleted from spoken text
+_EMOJI_TRANS = str.maketrans('', '', '🎯🧹🚫🔄✅👁️🧠🎭💭🖨️📝')
+
+# Sentence boundaries - each sentence is queued as its own item
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+class TTSBase:
+    """Speech queue and text preparation shared by the TTS engines"""
+
+    def __init__(self):
+        # Pending speech, guarded by one condition so draining it is a
+        # single clear() and the worker can sleep until text arrives
+        self.speech_queue = deque()
+        self._speech_cv = threading.Condition()
+
+    def _clean_for_speech(self, text):
+        """Clean text for natural speech output"""
+        # Remove timestamps
+        text = _RE_TS.sub('', text)
+
+        # Remove emoji and special characters
+        text = text.translate(_EMOJI_TRANS)
+
+        # Remove debug markers
+        text = _RE_DEBUG.sub('', text)
+
+        # Normalize whitespace
+        text = ' '.join(text.split())
+
+        return text.strip()
+
+    def _split_sentences(self, text):
+        """Clean text and split it into non-empty sentences"""
+        return [sent for sent in _SENTENCE_SPLIT_RE.split(self._clean_for_speech(text)) if sent]
+
+    def _enqueue(self, items):
+        """Append items to the speech queue and wake the worker"""
+        with self._speech_cv:
+            self.speech_queue.extend(items)
+            self._speech_cv.notify()
+
+    def _take(self, max_items=1, timeout=0.5):
+        """
+        Pop up to max_items from the speech queue
+
+        Args:
+            max_items: Most items to return at once
+            timeout: Seconds to wait when the queue is empty
+
+        Returns:
+            List of items, empty if nothing arrived before the timeout
+        """
+        with self._speech_cv:
+            if not self.speech_queue:
+                self._speech_cv.wait(timeout=timeout)
+            count = min(len(self.speech_queue), max_items)
+            return [self.speech_queue.popleft() for _ in range(count)]
+
+    def _drop_queued(self):
+        """Discard all queued speech and return how many items were dropped"""
+        with self._speech_cv:
+            dropped = len(self.speech_queue)
+            self.speech_queue.clear()
+            return dropped
+
+    def _wake_workers(self):
+        """Wake any worker waiting on the speech queue (used when stopping)"""
+        with self._speech_cv:
+            self._speech_cv.notify_all()
@@ -4,17 +4,65 @@ Uses Piper TTS for fast, local text-to-speech
 """
 
 import os
+import io
+import json
+import wave
 import subprocess
 import tempfile
 import threading
 import queue
 import time
+from array import array
+from collections import deque, OrderedDict
 from pathlib import Path
 
+from tts_base import TTSBase
+
+try:
+    import sounddevice as sd
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):
+    # sounddevice is optional - playback falls back to winsound
+    SOUNDDEVICE_AVAILABLE = False
+
 # Debug flag
 DEBUG_VOICE = True
 
-class VoiceSystem:
+# Length of the fade-in/out applied to each phrase, to avoid clicks
+FADE_MS = 2
+
+# Recently spoken short phrases kept as ready-to-play audio, so repeated
+# acknowledgements and status lines skip Piper entirely
+PCM_CACHE_SIZE = 64
+PCM_CACHE_MAX_CHARS = 80
+
+# Lines of Piper stderr kept for diagnosing a failed or crashed process
+STDERR_RING_SIZE = 64
+
+
+def _wav_bytes(pcm, sample_rate):
+    """Wrap mono 16-bit PCM in an in-memory WAV for winsound.SND_MEMORY"""
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buf.getvalue()
+
+
+def _apply_fade(pcm, sample_rate):
+    """Ramp the first and last FADE_MS of 16-bit PCM in from and out to silence"""
+    samples = array('h', pcm)  # Piper writes little-endian, as are Windows hosts
+    n = min(len(samples) // 2, sample_rate * FADE_MS // 1000)
+    for i in range(n):
+        gain = i / n
+        samples[i] = int(samples[i] * gain)
+        samples[-1 - i] = int(samples[-1 - i] * gain)
+    return samples.tobytes()
+
+
+class VoiceSystem(TTSBase):
     """Manages text-to-speech output for AI consciousness"""
     
     def __init__(self, voice_model="en_US-lessac-medium"):
@@ -28,21 +76,51 @@ class VoiceSystem:
                 - en_US-ryan-high (male, expressive)
                 - en_US-amy-medium (female, natural)
         """
+        super().__init__()
         self.voice_model = voice_model
         self.piper_exe = None
         self.model_path = None
         
-        # Speech queue for async processing
-        self.speech_queue = queue.Queue()
+        # Speech pipeline: text -> synthesis -> audio -> playback
+        # Piper renders the next phrase while the current one is playing;
+        # holding only one finished phrase keeps memory flat and lets
+        # clear_queue() discard little work
+        self.audio_queue = queue.Queue(maxsize=1)
         self.is_speaking = False
+        
+        # Phrases queued but not yet played, so callers can wait for silence
+        self._pending = 0
+        self._idle_cv = threading.Condition()
         self.should_stop = False
         
         # Voice style settings
         self.whisper_mode = False
         self.speech_rate = 1.0  # 1.0 = normal, 0.5 = 2x faster, 2.0 = 2x slower
         
-        # Worker thread
-        self.worker_thread = None
+        # Long-lived Piper processes keyed by whisper flag, so the voice
+        # model is loaded once instead of once per phrase
+        self.piper_procs = {}
+        
+        # Recent Piper log lines, filled by a reader thread per process
+        self._stderr_ring = deque(maxlen=STDERR_RING_SIZE)
+        
+        # Piper command lines per mode; rebuilt when a setter marks them dirty
+        self._cmd_cache = {}
+        self._cmd_dirty = True
+        
+        # Finished audio for short phrases, least recently used first
+        self._pcm_cache = OrderedDict()
+        
+        # Scratch WAV that Piper overwrites for every phrase; the synth
+        # thread reads it back before asking for the next one
+        self._wav_path = os.path.join(tempfile.gettempdir(), f"voice_{os.getpid()}_{id(self):x}.wav")
+        
+        # Output stream reused across phrases when sounddevice is installed
+        self._stream = None
+        
+        # Worker threads
+        self.synth_thread = None
+        self.play_thread = None
         
         # Check if Piper is available
         self._check_piper_installation()
@@ -85,14 +163,23 @@ class VoiceSystem:
         return True
     
     def start(self):
-        """Start the voice worker thread"""
+        """Start the synthesis and playback worker threads"""
         if not self.piper_exe or not self.model_path:
             if DEBUG_VOICE:
                 print("🔇 Voice system disabled (Piper not available)")
             return False
         
-        self.worker_thread = threading.Thread(target=self._voice_worker, daemon=True)
-        self.worker_thread.start()
+        # Load the voice model now rather than on the first phrase
+        try:
+            self._get_piper(self.whisper_mode)
+        except OSError as e:
+            print(f"⚠️ Could not start Piper: {e}")
+            return False
+        
+        self.synth_thread = threading.Thread(target=self._synth_worker, daemon=True)
+        self.play_thread = threading.Thread(target=self._play_worker, daemon=True)
+        self.synth_thread.start()
+        self.play_thread.start()
         
         if DEBUG_VOICE:
             print("🔊 Voice system started")
@@ -112,6 +199,7 @@ class VoiceSystem:
             rate: Speech speed multiplier (1.0 = normal, 0.5 = 2x faster, 2.0 = 2x slower)
         """
         self.speech_rate = max(0.5, min(2.0, rate))  # Clamp between 0.5 and 2.0
+        self._cmd_dirty = True
         if DEBUG_VOICE:
             print(f"⏱️ Speech rate set to: {self.speech_rate}x")
     
@@ -127,166 +215,330 @@ class VoiceSystem:
         if not self.piper_exe:
             return
         
-        # Clean text for speech
-        text = self._clean_for_speech(text)
+        # Clean text for speech, sentence by sentence so the first one plays sooner
+        sentences = self._split_sentences(text)
+        if not sentences:
+            return
         
         # Determine whisper mode for this speech
         use_whisper = whisper if whisper is not None else self.whisper_mode
         
         if priority:
             # Clear queue for urgent speech
-            while not self.speech_queue.empty():
-                try:
-                    self.speech_queue.get_nowait()
-                except queue.Empty:
-                    break
+            self.clear_queue()
         
-        self.speech_queue.put((text, use_whisper))
+        with self._idle_cv:
+            self._pending += len(sentences)
+        self._enqueue((sent, use_whisper) for sent in sentences)
         
         if DEBUG_VOICE:
-            queue_size = self.speech_queue.qsize()
-            print(f"🎙️ Queued speech: {text[:50]}... (queue: {queue_size})")
-    
-    def _clean_for_speech(self, text):
-        """Clean text for natural speech output"""
-        import re
-        
-        # Remove timestamps
-        text = re.sub(r'\[\d{2}:\d{2}:\d{2}\]', '', text)
-        
-        # Remove emoji and special characters
-        text = re.sub(r'[🎯🧹🚫🔄✅👁️🧠🎭💭🖨️📝]', '', text)
-        
-        # Remove debug markers
-        text = re.sub(r'\[(?:DEBUG|System|Tone)[^\]]*\]', '', text)
-        
-        # Normalize whitespace
-        text = ' '.join(text.split())
-        
-        return text.strip()
+            queue_size = len(self.speech_queue)
+            print(f"🎙️ Queued speech: {' '.join(sentences)[:50]}... (queue: {queue_size})")
     
-    def _voice_worker(self):
-        """Worker thread that processes speech queue"""
+    def _synth_worker(self):
+        """Worker thread that turns queued text into PCM audio"""
         while not self.should_stop:
+            # Get text and whisper flag from queue (blocking with timeout)
+            items = self._take()
+            
+            if not items:
+                # Idle - restart any Piper that died so the next phrase is fast
+                self._respawn_dead_pipers()
+                continue
+            
+            text, use_whisper = items[0]
             try:
-                # Get text and whisper flag from queue (blocking with timeout)
-                item = self.speech_queue.get(timeout=0.5)
-                
-                if item:
-                    # Unpack tuple (text, whisper_mode)
-                    if isinstance(item, tuple):
-                        text, use_whisper = item
-                    else:
-                        # Backwards compatibility
-                        text = item
-                        use_whisper = self.whisper_mode
-                    
-                    self._synthesize_and_play(text, use_whisper)
+                audio = self._synthesize_cached(text, use_whisper)
+                if audio:
+                    pcm, sample_rate = audio
+                    self._hand_off((pcm, sample_rate, use_whisper))
+                else:
+                    self._mark_done()
                     
+            except Exception as e:
+                if DEBUG_VOICE:
+                    print(f"❌ Voice worker error: {e}")
+    
+    def _hand_off(self, item):
+        """Wait for room in the one-slot audio queue, unless stopping"""
+        while not self.should_stop:
+            try:
+                self.audio_queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        self._mark_done()
+    
+    def _play_worker(self):
+        """Worker thread that plays synthesized audio in order"""
+        while not self.should_stop:
+            try:
+                pcm, sample_rate, use_whisper = self.audio_queue.get(timeout=0.5)
             except queue.Empty:
                 continue
+            
+            self.is_speaking = True
+            try:
+                self._play_audio(pcm, sample_rate, whisper=use_whisper)
             except Exception as e:
                 if DEBUG_VOICE:
-                    print(f"❌ Voice worker error: {e}")
+                    print(f"❌ Playback error: {e}")
+            finally:
+                self.is_speaking = False
+                self._mark_done()
     
-    def _synthesize_and_play(self, text, use_whisper=False):
-        """Synthesize speech and play it"""
-        self.is_speaking = True
+    def _mark_done(self, count=1):
+        """Record finished (or discarded) phrases and wake idle waiters"""
+        with self._idle_cv:
+            self._pending = max(0, self._pending - count)
+            if self._pending == 0:
+                self._idle_cv.notify_all()
+    
+    def wait_until_idle(self, timeout=None):
+        """
+        Block until every queued phrase has been spoken
+        
+        Args:
+            timeout: Maximum seconds to wait (None = wait forever)
+        
+        Returns:
+            True if speech finished, False if the timeout expired
+        """
+        with self._idle_cv:
+            return self._idle_cv.wait_for(lambda: self._pending == 0, timeout)
+    
+    def _synthesis_params(self, use_whisper):
+        """Return (noise_scale, length_scale, noise_w) for a speech mode"""
+        if use_whisper:
+            # Whisper settings: breathier, slower, more variation
+            return (
+                0.9,   # noise_scale: higher = breathier, more air sound
+                1.3,   # length_scale: slower, more deliberate
+                1.0    # noise_w: more phoneme variation
+            )
+        # Normal speech settings
+        return (
+            0.667,              # noise_scale: default
+            self.speech_rate,   # length_scale: use configured rate
+            0.8                 # noise_w: default
+        )
+    
+    def _piper_cmd(self, use_whisper):
+        """Return the Piper command line for a mode, rebuilt only after settings change"""
+        if self._cmd_dirty:
+            self._cmd_cache = {}
+            for mode in (False, True):
+                noise_scale, length_scale, noise_w = self._synthesis_params(mode)
+                self._cmd_cache[mode] = (
+                    self.piper_exe,
+                    "--model", self.model_path,
+                    "--json-input",
+                    "--output_dir", tempfile.gettempdir(),
+                    "--noise_scale", str(noise_scale),
+                    "--length_scale", str(length_scale),
+                    "--noise_w", str(noise_w),
+                    "--sentence_silence", "0.3"  # Slightly longer pauses
+                )
+            self._cmd_dirty = False
+        return self._cmd_cache[use_whisper]
+    
+    def _get_piper(self, use_whisper):
+        """Return a running Piper process for this mode, spawning it if needed"""
+        cmd = self._piper_cmd(use_whisper)
+        entry = self.piper_procs.get(use_whisper)
+        
+        if entry:
+            proc_cmd, proc = entry
+            if proc_cmd == cmd and proc.poll() is None:
+                return proc
+            # Settings changed (e.g. speech rate) or Piper exited
+            self._close_piper(proc)
+        
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0
+        )
+        self.piper_procs[use_whisper] = (cmd, proc)
+        threading.Thread(target=self._read_stderr, args=(proc.stderr,), daemon=True).start()
         
+        if DEBUG_VOICE:
+            print(f"🚀 Piper process started ({'whisper' if use_whisper else 'normal'} mode)")
+        return proc
+    
+    def _read_stderr(self, stream):
+        """Keep the last few Piper log lines; runs until the process exits"""
+        for line in iter(stream.readline, b''):
+            self._stderr_ring.append(line.decode('utf-8', 'replace').rstrip())
+        stream.close()
+    
+    def _print_stderr(self):
+        """Show recent Piper log output after a failure"""
+        if self._stderr_ring:
+            print("   Piper output:\n   " + "\n   ".join(self._stderr_ring))
+    
+    def _respawn_dead_pipers(self):
+        """Watchdog: restart Piper processes that have exited"""
+        for use_whisper, (_, proc) in list(self.piper_procs.items()):
+            if proc.poll() is not None:
+                if DEBUG_VOICE:
+                    print(f"⚠️ Piper exited (code {proc.returncode}) - restarting")
+                    self._print_stderr()
+                try:
+                    self._get_piper(use_whisper)
+                except OSError as e:
+                    print(f"❌ Could not restart Piper: {e}")
+                    del self.piper_procs[use_whisper]
+    
+    def _close_piper(self, proc):
+        """Shut down a Piper process by closing its input"""
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=2.0)
+        except Exception:
+            proc.kill()
+    
+    def _synthesize_cached(self, text, use_whisper):
+        """Return faded (pcm_bytes, sample_rate) for a phrase, reusing recent results"""
+        # The command line captures the voice settings, so a rate change misses
+        key = (text, self._piper_cmd(use_whisper))
+        audio = self._pcm_cache.get(key)
+        if audio:
+            self._pcm_cache.move_to_end(key)
+            return audio
+        
+        audio = self._synthesize(text, use_whisper)
+        if not audio:
+            return None
+        pcm, sample_rate = audio
+        audio = (_apply_fade(pcm, sample_rate), sample_rate)
+        
+        if len(text) <= PCM_CACHE_MAX_CHARS:
+            self._pcm_cache[key] = audio
+            if len(self._pcm_cache) > PCM_CACHE_SIZE:
+                self._pcm_cache.popitem(last=False)
+        return audio
+    
+    def _synthesize(self, text, use_whisper=False):
+        """Synthesize speech and return (pcm_bytes, sample_rate), or None"""
+        wav_path = self._wav_path
         try:
-            # Create temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                wav_path = temp_file.name
-            
-            # Configure Piper parameters based on mode
-            if use_whisper:
-                # Whisper settings: breathier, slower, more variation
-                noise_scale = 0.9      # Higher = breathier, more air sound
-                length_scale = 1.3     # Slower, more deliberate
-                noise_w = 1.0          # More phoneme variation
-            else:
-                # Normal speech settings
-                noise_scale = 0.667    # Default
-                length_scale = self.speech_rate  # Use configured rate
-                noise_w = 0.8          # Default
-            
-            # Run Piper to generate speech
-            cmd = [
-                self.piper_exe,
-                "--model", self.model_path,
-                "--output_file", wav_path,
-                "--noise_scale", str(noise_scale),
-                "--length_scale", str(length_scale),
-                "--noise_w", str(noise_w),
-                "--sentence_silence", "0.3"  # Slightly longer pauses
-            ]
-            
             if DEBUG_VOICE:
                 mode_indicator = "🤫" if use_whisper else "🎤"
                 print(f"{mode_indicator} Synthesizing: {text[:60]}...")
             
-            # Send text to Piper via stdin
-            result = subprocess.run(
-                cmd,
-                input=text.encode('utf-8'),
-                capture_output=True,
-                timeout=10
-            )
+            # One JSON line per phrase; Piper answers with the path it wrote
+            proc = self._get_piper(use_whisper)
+            request = (json.dumps({"text": text, "output_file": wav_path}) + "\n").encode('utf-8')
+            self._write_all(proc.stdin.fileno(), request)
             
-            if result.returncode == 0:
-                # Play the audio file with volume adjustment
-                self._play_audio(wav_path, whisper=use_whisper)
-            else:
-                if DEBUG_VOICE:
-                    print(f"❌ Piper synthesis failed: {result.stderr.decode()}")
+            # A plain blocking read: it releases the GIL while Piper works,
+            # and selectors cannot wait on pipes on Windows anyway
+            if proc.stdout.readline():
+                # Load the audio into memory; playback never touches the disk
+                with wave.open(wav_path, 'rb') as wav:
+                    return wav.readframes(wav.getnframes()), wav.getframerate()
             
-            # Clean up temp file
-            try:
-                os.unlink(wav_path)
-            except:
-                pass
+            if DEBUG_VOICE:
+                print(f"❌ Piper synthesis failed (exit code {proc.poll()})")
+                self._print_stderr()
                 
         except Exception as e:
             if DEBUG_VOICE:
                 print(f"❌ Speech synthesis error: {e}")
-        finally:
-            self.is_speaking = False
+        return None
     
-    def _play_audio(self, wav_path, whisper=False):
-        """Play audio file using Windows sound with optional volume adjustment"""
+    def _write_all(self, fd, data):
+        """Write bytes straight to a pipe fd, looping over partial writes"""
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    
+    def _remove_file(self, path):
+        """Delete a temporary audio file, ignoring errors"""
+        try:
+            os.unlink(path)
+        except:
+            pass
+    
+    def _get_stream(self, sample_rate):
+        """Return an open sounddevice output stream for this sample rate"""
+        if self._stream is not None and self._stream.samplerate != sample_rate:
+            self._close_stream()
+        if self._stream is None:
+            self._stream = sd.RawOutputStream(samplerate=sample_rate, channels=1, dtype='int16')
+            self._stream.start()
+        return self._stream
+    
+    def _close_stream(self):
+        """Close the sounddevice output stream, if one is open"""
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+    
+    def _play_audio(self, pcm, sample_rate, whisper=False):
+        """Play mono 16-bit PCM from memory"""
+        # For whisper mode, we could reduce system volume, but that affects everything
+        # Instead, we'll rely on the synthesis parameters to create a quieter effect
+        # The breathier sound naturally sounds quieter
+        
+        if SOUNDDEVICE_AVAILABLE:
+            self._get_stream(sample_rate).write(pcm)
+            return
+        
         try:
-            # For whisper mode, we could reduce system volume, but that affects everything
-            # Instead, we'll rely on the synthesis parameters to create a quieter effect
-            # The breathier sound naturally sounds quieter
-            
             import winsound
-            winsound.PlaySound(wav_path, winsound.SND_FILENAME)
+            # Synchronous on purpose: winsound rejects SND_ASYNC with
+            # SND_MEMORY, and this already runs on the playback thread, so
+            # synthesis of the next phrase is not held up
+            winsound.PlaySound(_wav_bytes(pcm, sample_rate), winsound.SND_MEMORY)
             
         except ImportError:
-            # Fallback to command line player
+            # Fallback to calling winmm directly - no PowerShell/CLR startup
             try:
-                subprocess.run(['powershell', '-c', f'(New-Object Media.SoundPlayer "{wav_path}").PlaySync()'], 
-                             check=True, capture_output=True, timeout=30)
-            except:
+                import ctypes
+                SND_MEMORY = 0x0004
+                ctypes.windll.winmm.PlaySoundW(_wav_bytes(pcm, sample_rate), None, SND_MEMORY)
+            except (AttributeError, OSError):
                 if DEBUG_VOICE:
                     print("❌ Could not play audio")
     
     def stop(self):
         """Stop the voice system"""
         self.should_stop = True
-        if self.worker_thread:
-            self.worker_thread.join(timeout=2.0)
+        self._wake_workers()
+        for thread in (self.synth_thread, self.play_thread):
+            if thread:
+                thread.join(timeout=2.0)
+        self.clear_queue()
+        
+        for _, proc in self.piper_procs.values():
+            self._close_piper(proc)
+        self.piper_procs.clear()
+        self._close_stream()
+        self._remove_file(self._wav_path)
         
         if DEBUG_VOICE:
             print("🔇 Voice system stopped")
     
     def clear_queue(self):
-        """Clear all pending speech"""
-        while not self.speech_queue.empty():
+        """Clear all pending speech, including audio already synthesized"""
+        cleared = self._drop_queued()
+        
+        while not self.audio_queue.empty():
             try:
-                self.speech_queue.get_nowait()
+                self.audio_queue.get_nowait()
             except queue.Empty:
                 break
+            cleared += 1
+        
+        if cleared:
+            self._mark_done(cleared)
 
 
 # Test function
@@ -3,7 +3,8 @@ Simple Windows TTS system - instant, no downloads needed
 Classic robotic voice with full control over pitch, rate, volume
 """
 import threading
-import queue
+
+from tts_base import TTSBase
 
 try:
     import pyttsx3
@@ -14,14 +15,21 @@ except ImportError:
 
 DEBUG_VOICE = True
 
-class WindowsTTS:
+# Most queued sentences handed to SAPI in one say()/runAndWait() call
+SPEAK_BATCH_MAX = 8
+
+class WindowsTTS(TTSBase):
     """Classic Windows text-to-speech system"""
     
     def __init__(self):
         """Initialize Windows TTS engine"""
+        super().__init__()
         self.engine = None
-        self.speech_queue = queue.Queue()
         self.is_speaking = False
+        
+        # Set while nothing is queued or speaking, so callers can wait on it
+        self._idle = threading.Event()
+        self._idle.set()
         self.should_stop = False
         self.worker_thread = None
         
@@ -29,6 +37,7 @@ class WindowsTTS:
         self.rate = 150        # Words per minute (default ~200, range 0-400)
         self.volume = 0.9      # Volume 0.0-1.0
         self.voice_gender = "female"  # "male" or "female"
+        self._voice_ids = {}
         
         if not PYTTSX3_AVAILABLE:
             print("❌ Windows TTS not available - install pyttsx3")
@@ -36,6 +45,14 @@ class WindowsTTS:
         
         try:
             self.engine = pyttsx3.init()
+            
+            # Windows usually has David (male) and Zira (female); look them
+            # up once rather than on every voice change
+            voices = self.engine.getProperty('voices')
+            self._voice_ids = {
+                "male": next((v.id for v in voices if "david" in v.name.lower()), None),
+                "female": next((v.id for v in voices if "zira" in v.name.lower()), None),
+            }
             self._configure_voice()
             if DEBUG_VOICE:
                 print("✅ Windows TTS initialized")
@@ -55,16 +72,9 @@ class WindowsTTS:
         self.engine.setProperty('volume', self.volume)
         
         # Try to set voice gender
-        voices = self.engine.getProperty('voices')
-        
-        # Windows usually has David (male) and Zira (female)
-        for voice in voices:
-            if self.voice_gender == "female" and "zira" in voice.name.lower():
-                self.engine.setProperty('voice', voice.id)
-                break
-            elif self.voice_gender == "male" and "david" in voice.name.lower():
-                self.engine.setProperty('voice', voice.id)
-                break
+        voice_id = self._voice_ids.get(self.voice_gender)
+        if voice_id:
+            self.engine.setProperty('voice', voice_id)
         
         if DEBUG_VOICE:
             print(f"   Rate: {self.rate} wpm")
@@ -138,58 +148,60 @@ class WindowsTTS:
             return
         
         # Clean text
-        text = self._clean_for_speech(text)
+        sentences = self._split_sentences(text)
+        if not sentences:
+            return
         
         if priority:
             # Clear queue for urgent speech
-            while not self.speech_queue.empty():
-                try:
-                    self.speech_queue.get_nowait()
-                except queue.Empty:
-                    break
+            self.clear_queue()
             # Stop current speech
             if self.is_speaking:
                 self.engine.stop()
         
-        self.speech_queue.put(text)
+        # Queue sentence by sentence so speech starts after the first one
+        with self._speech_cv:
+            self._idle.clear()
+            self._enqueue(sentences)
         
         if DEBUG_VOICE:
-            queue_size = self.speech_queue.qsize()
-            print(f"🎙️ Queued: {text[:50]}... (queue: {queue_size})")
-    
-    def _clean_for_speech(self, text):
-        """Clean text for speech output"""
-        import re
-        
-        # Remove timestamps
-        text = re.sub(r'\[\d{2}:\d{2}:\d{2}\]', '', text)
-        
-        # Remove emoji and special characters
-        text = re.sub(r'[🎯🧹🚫🔄✅👁️🧠🎭💭🖨️📝]', '', text)
-        
-        # Remove debug markers
-        text = re.sub(r'\[(?:DEBUG|System|Tone)[^\]]*\]', '', text)
-        
-        # Normalize whitespace
-        text = ' '.join(text.split())
-        
-        return text.strip()
+            queue_size = len(self.speech_queue)
+            print(f"🎙️ Queued: {' '.join(sentences)[:50]}... (queue: {queue_size})")
     
     def _voice_worker(self):
         """Worker thread that processes speech queue"""
         while not self.should_stop:
+            # Get text from queue (blocking with timeout), taking whatever else
+            # is already waiting so SAPI is set up once for the whole batch
+            with self._speech_cv:
+                text = " ".join(self._take(SPEAK_BATCH_MAX))
+                if text:
+                    # Claimed under the lock so clear_queue() can't report idle
+                    self.is_speaking = True
+            
             try:
-                # Get text from queue (blocking with timeout)
-                text = self.speech_queue.get(timeout=0.5)
-                
                 if text:
                     self._synthesize_and_play(text)
                     
-            except queue.Empty:
-                continue
             except Exception as e:
                 if DEBUG_VOICE:
                     print(f"❌ Voice worker error: {e}")
+            
+            with self._speech_cv:
+                if not self.speech_queue:
+                    self._idle.set()
+    
+    def wait_until_idle(self, timeout=None):
+        """
+        Block until every queued sentence has been spoken
+        
+        Args:
+            timeout: Maximum seconds to wait (None = wait forever)
+        
+        Returns:
+            True if speech finished, False if the timeout expired
+        """
+        return self._idle.wait(timeout)
     
     def _synthesize_and_play(self, text):
         """Synthesize and play speech"""
@@ -212,6 +224,7 @@ class WindowsTTS:
     def stop(self):
         """Stop the voice system"""
         self.should_stop = True
+        self._wake_workers()
         if self.engine:
             self.engine.stop()
         if self.worker_thread:
@@ -222,11 +235,10 @@ class WindowsTTS:
     
     def clear_queue(self):
         """Clear all pending speech"""
-        while not self.speech_queue.empty():
-            try:
-                self.speech_queue.get_nowait()
-            except queue.Empty:
-                break
+        with self._speech_cv:
+            self._drop_queued()
+            if not self.is_speaking:
+                self._idle.set()
 
 
 # Test function
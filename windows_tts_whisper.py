@@ -2,35 +2,188 @@
 Windows TTS with REAL whisper effect using DSP
 Transforms normal speech into actual whisper (not fake slow-down!)
 """
+import io
+import atexit
+import struct
 import threading
-import queue
 import tempfile
 import os
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
 
+from tts_base import TTSBase
+
 try:
     import pyttsx3
     PYTTSX3_AVAILABLE = True
 except ImportError:
     PYTTSX3_AVAILABLE = False
 
-try:
-    import numpy as np
-    from scipy import signal
-    from pydub import AudioSegment
-    DSP_AVAILABLE = True
-except ImportError:
-    DSP_AVAILABLE = False
+# The DSP libraries cost noticeable startup time and memory, and most
+# sessions never whisper - they are imported by _load_dsp() on first use
+DSP_AVAILABLE = all(find_spec(name) for name in ("numpy", "scipy", "pydub"))
+NUMBA_AVAILABLE = False
+_DSP_LOADED = False
 
 DEBUG_VOICE = True
 
-class WindowsTTSWithWhisper:
+# Utterances shorter than this - in characters or seconds of audio - skip the
+# spectral whisper, whose fixed cost dominates tiny clips, and only get a
+# causal high-pass and gain reduction
+SHORT_WHISPER_CHARS = 8
+SHORT_WHISPER_SECONDS = 0.3
+
+
+@lru_cache(maxsize=None)
+def _find_ffmpeg():
+    """Find a local ffmpeg install once per process and put it on PATH"""
+    # Matches ffmpeg/bin/ffmpeg.exe and ffmpeg/ffmpeg-*/bin/ffmpeg.exe
+    for match in Path("ffmpeg").rglob("ffmpeg.exe"):
+        if match.parent.name == "bin":
+            os.environ["PATH"] = str(match.parent) + os.pathsep + os.environ["PATH"]
+            return str(match.absolute())
+    return None
+
+
+def _pack_wav_header(n_samples, sample_rate, channels, sample_width=2):
+    """Build the 44-byte RIFF header for n_samples of interleaved 16-bit PCM"""
+    data_size = n_samples * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate,
+        sample_rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b'data', data_size
+    )
+
+
+@lru_cache(maxsize=8)
+def _highpass_sos(sample_rate):
+    """500 Hz 4th-order Butterworth high-pass, designed once per sample rate"""
+    sos = signal.butter(4, 500 / (sample_rate / 2), btype='high', output='sos')
+    return sos.astype(np.float32)  # float32 keeps sosfilt in float32
+
+
+def _whisper_response(n, sample_rate):
+    """
+    Zero-phase response of the whisper filters at the rfft bins of n samples
+    
+    Equivalent to running the 500 Hz 4th-order Butterworth high-pass with
+    filtfilt, then mixing x0.5 with its 2-8 kHz 2nd-order Butterworth
+    band-pass (breath) at x0.15. filtfilt applies |H|^2, and for bilinear
+    Butterworth designs that has a closed form in tan(w/2) - much cheaper
+    than evaluating the SOS sections with sosfreqz
+    
+    Args:
+        n: Number of time-domain samples
+        sample_rate: Sample rate in Hz
+    """
+    # Prewarped bin frequencies, tan(w/2) - inf/0 at the band edges resolve
+    # to a response of 0 below
+    tan_w = np.tan(np.arange(n // 2 + 1, dtype=np.float32) * np.float32(np.pi / n))
+    tan_hp = np.float32(np.tan(np.pi * 500 / sample_rate))
+    tan_lo = np.tan(np.pi * 2000 / sample_rate)
+    tan_hi = np.tan(np.pi * min(0.99 * sample_rate / 2, 8000) / sample_rate)
+    
+    with np.errstate(divide='ignore', over='ignore'):
+        # High-pass: 1 / (1 + (tan_hp / tan_w)^8)
+        highpass = tan_hp / tan_w
+        highpass *= highpass
+        highpass *= highpass
+        highpass *= highpass
+        highpass += 1
+        np.reciprocal(highpass, out=highpass)
+        
+        # Band-pass: 1 / (1 + ((tan_w^2 - tan_lo*tan_hi) / (tan_w*(tan_hi - tan_lo)))^4)
+        band = tan_w * tan_w
+        band -= np.float32(tan_lo * tan_hi)
+        band /= tan_w
+        band *= np.float32(1 / (tan_hi - tan_lo))
+        band *= band
+        band *= band
+        band += 1
+        np.reciprocal(band, out=band)
+    
+    # Reduce amplitude MORE (x0.5, from 0.7) and add the breath band at 0.3
+    # of that - all applied after the high-pass
+    band *= 0.15
+    band += 0.5
+    band *= highpass
+    return band
+
+
+# Paul Kellett's pink noise filter: six one-pole sections plus direct terms
+_PINK_POLES = (0.99886, 0.99332, 0.96900, 0.86650, 0.55000, -0.7616)
+_PINK_GAINS = (0.0555179, 0.0750759, 0.1538520, 0.3104856, 0.5329522, -0.0168980)
+
+
+def _pink_kellett_lfilter(white):
+    """Filter white noise to pink with Kellett's filter, one lfilter per pole"""
+    pink = white * 0.5362
+    for pole, gain in zip(_PINK_POLES, _PINK_GAINS):
+        pink += signal.lfilter([gain], [1.0, -pole], white)
+    pink[1:] += white[:-1] * 0.115926
+    return pink
+
+
+def _pink_kellett_loop(white):
+    """Same as _pink_kellett_lfilter as one loop, compiled by numba"""
+    pink = np.empty_like(white)
+    b0 = b1 = b2 = b3 = b4 = b5 = b6 = 0.0
+    for i in range(white.shape[0]):
+        w = white[i]
+        b0 = 0.99886 * b0 + w * 0.0555179
+        b1 = 0.99332 * b1 + w * 0.0750759
+        b2 = 0.96900 * b2 + w * 0.1538520
+        b3 = 0.86650 * b3 + w * 0.3104856
+        b4 = 0.55000 * b4 + w * 0.5329522
+        b5 = -0.7616 * b5 - w * 0.0168980
+        pink[i] = b0 + b1 + b2 + b3 + b4 + b5 + b6 + w * 0.5362
+        b6 = w * 0.115926
+    return pink
+
+
+def _load_dsp():
+    """Import the whisper DSP libraries once; returns DSP_AVAILABLE"""
+    global _DSP_LOADED, DSP_AVAILABLE, NUMBA_AVAILABLE
+    global np, signal, spfft, uniform_filter1d, AudioSegment, _rng, _pink_kellett
+    if _DSP_LOADED or not DSP_AVAILABLE:
+        return DSP_AVAILABLE
+    
+    try:
+        import numpy as np
+        from scipy import signal
+        from scipy import fft as spfft
+        from scipy.ndimage import uniform_filter1d
+        from pydub import AudioSegment
+    except ImportError as e:
+        print(f"⚠️ Whisper DSP failed to load: {e}")
+        DSP_AVAILABLE = False
+        return False
+    
+    # One generator for all breath noise - PCG64 is faster than the legacy
+    # global RandomState
+    _rng = np.random.default_rng()
+    
+    try:
+        from numba import njit
+        NUMBA_AVAILABLE = True
+        _pink_kellett = njit(cache=True)(_pink_kellett_loop)
+    except ImportError:
+        # numba is optional - pink noise falls back to scipy's lfilter
+        _pink_kellett = _pink_kellett_lfilter
+    
+    _DSP_LOADED = True
+    return True
+
+class WindowsTTSWithWhisper(TTSBase):
     """Windows TTS with real whisper DSP processing"""
     
     def __init__(self):
         """Initialize Windows TTS engine"""
+        super().__init__()
         self.engine = None
-        self.speech_queue = queue.Queue()
         self.is_speaking = False
         self.should_stop = False
         self.worker_thread = None
@@ -43,6 +196,11 @@ class WindowsTTSWithWhisper:
         # Whisper mode
         self.whisper_enabled = False
         
+        # Scratch WAV that pyttsx3 renders whispered speech into; reused for
+        # every utterance and removed when the process exits
+        self._scratch_in = os.path.join(tempfile.gettempdir(), f"tts_in_{os.getpid()}_{id(self):x}.wav")
+        atexit.register(self._remove_scratch)
+        
         # Set ffmpeg path for pydub
         self._setup_ffmpeg()
         
@@ -67,20 +225,9 @@ class WindowsTTSWithWhisper:
     
     def _setup_ffmpeg(self):
         """Setup ffmpeg path for pydub"""
-        # Look for local ffmpeg installation
-        possible_paths = [
-            Path("ffmpeg") / "ffmpeg-*" / "bin" / "ffmpeg.exe",
-            Path("ffmpeg") / "bin" / "ffmpeg.exe",
-        ]
-        
-        for pattern in possible_paths:
-            matches = list(Path(".").glob(str(pattern)))
-            if matches:
-                ffmpeg_path = str(matches[0].absolute())
-                os.environ["PATH"] = str(matches[0].parent) + os.pathsep + os.environ["PATH"]
-                if DEBUG_VOICE:
-                    print(f"✅ Found ffmpeg at: {ffmpeg_path}")
-                break
+        ffmpeg_path = _find_ffmpeg()
+        if ffmpeg_path and DEBUG_VOICE:
+            print(f"✅ Found ffmpeg at: {ffmpeg_path}")
     
     def _configure_voice(self):
         """Configure voice parameters"""
@@ -119,7 +266,7 @@ class WindowsTTSWithWhisper:
     
     def set_whisper_mode(self, enabled=True):
         """Enable/disable real whisper DSP processing"""
-        if not DSP_AVAILABLE:
+        if not DSP_AVAILABLE or (enabled and not _load_dsp()):
             if DEBUG_VOICE and enabled:
                 print("⚠️ Whisper mode requested but DSP not available")
             return
@@ -156,46 +303,28 @@ class WindowsTTSWithWhisper:
         use_whisper = whisper if whisper is not None else self.whisper_enabled
         
         if priority:
-            while not self.speech_queue.empty():
-                try:
-                    self.speech_queue.get_nowait()
-                except queue.Empty:
-                    break
+            self._drop_queued()
             if self.is_speaking:
                 self.engine.stop()
         
-        self.speech_queue.put((text, use_whisper))
+        self._enqueue([(text, use_whisper)])
         
         if DEBUG_VOICE:
             mode = "🤫" if use_whisper else "🎙️"
-            print(f"{mode} Queued: {text[:50]}... (queue: {self.speech_queue.qsize()})")
-    
-    def _clean_for_speech(self, text):
-        """Clean text for speech output"""
-        import re
-        text = re.sub(r'\[\d{2}:\d{2}:\d{2}\]', '', text)
-        text = re.sub(r'[🎯🧹🚫🔄✅👁️🧠🎭💭🖨️📝]', '', text)
-        text = re.sub(r'\[(?:DEBUG|System|Tone)[^\]]*\]', '', text)
-        text = ' '.join(text.split())
-        return text.strip()
+            print(f"{mode} Queued: {text[:50]}... (queue: {len(self.speech_queue)})")
     
     def _voice_worker(self):
         """Worker thread that processes speech queue"""
         while not self.should_stop:
+            items = self._take()
+            if not items:
+                continue
+            
             try:
-                item = self.speech_queue.get(timeout=0.5)
-                
-                if item:
-                    if isinstance(item, tuple):
-                        text, use_whisper = item
-                    else:
-                        text = item
-                        use_whisper = self.whisper_enabled
-                    
+                text, use_whisper = items[0]
+                if text:
                     self._synthesize_and_play(text, use_whisper)
                     
-            except queue.Empty:
-                continue
             except Exception as e:
                 if DEBUG_VOICE:
                     print(f"❌ Voice worker error: {e}")
@@ -205,7 +334,7 @@ class WindowsTTSWithWhisper:
         self.is_speaking = True
         
         try:
-            if use_whisper and DSP_AVAILABLE:
+            if use_whisper and _load_dsp():
                 # Generate to WAV, apply whisper DSP, then play
                 self._speak_with_whisper_dsp(text)
             else:
@@ -223,160 +352,181 @@ class WindowsTTSWithWhisper:
     
     def _speak_with_whisper_dsp(self, text):
         """Generate speech, apply whisper DSP, and play"""
-        # Create temp WAV file for TTS output
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_in:
-            temp_in_path = temp_in.name
+        # Generate speech to WAV
+        if DEBUG_VOICE:
+            print(f"🤫 Whispering: {text[:60]}...")
+        
+        # pyttsx3 can only render to a file - overwrite the scratch file
+        # and read it back once
+        self.engine.save_to_file(text, self._scratch_in)
+        self.engine.runAndWait()
+        wav_data = Path(self._scratch_in).read_bytes()
         
+        # Apply whisper DSP - the cheap version for very short text
+        quick = len(text) < SHORT_WHISPER_CHARS
+        whisper_wav = self._apply_whisper_dsp(io.BytesIO(wav_data), quick)
+        
+        # Play whispered audio
+        self._play_wav_bytes(whisper_wav)
+    
+    def _remove_scratch(self):
+        """Delete the scratch WAV, ignoring errors"""
         try:
-            # Generate speech to WAV
-            if DEBUG_VOICE:
-                print(f"🤫 Whispering: {text[:60]}...")
-            
-            self.engine.save_to_file(text, temp_in_path)
-            self.engine.runAndWait()
-            
-            # Apply whisper DSP
-            whisper_audio = self._apply_whisper_dsp(temp_in_path)
-            
-            # Play whispered audio
-            self._play_audio_segment(whisper_audio)
-            
-        finally:
-            # Clean up
-            try:
-                os.unlink(temp_in_path)
-            except:
-                pass
+            os.unlink(self._scratch_in)
+        except OSError:
+            pass
     
-    def _apply_whisper_dsp(self, audio_path):
-        """Apply real whisper effect using DSP"""
+    def _apply_whisper_dsp(self, wav_file, quick=False):
+        """Apply real whisper effect to a WAV path or file object and return WAV bytes
+        
+        The result is a bytearray, which winsound's SND_MEMORY accepts as is
+        
+        Args:
+            wav_file: WAV path or file object
+            quick: Use the cheap high-pass-only whisper (also chosen for
+                clips under SHORT_WHISPER_SECONDS)
+        """
         # Load audio
-        audio = AudioSegment.from_wav(audio_path)
+        audio = AudioSegment.from_wav(wav_file)
         
         # Convert to numpy array
-        samples = np.array(audio.get_array_of_samples()).astype(np.float32)
+        # All DSP below stays in float32 - half the memory traffic of float64
+        samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
         sample_rate = audio.frame_rate
         channels = audio.channels
         
-        # Process each channel
-        if channels == 2:
-            # Stereo - process each channel
-            left = samples[::2]
-            right = samples[1::2]
-            left_whisper = self._whisperize(left, sample_rate)
-            right_whisper = self._whisperize(right, sample_rate)
-            # Interleave
-            whisper_samples = np.empty(len(samples), dtype=np.int16)
-            whisper_samples[::2] = left_whisper
-            whisper_samples[1::2] = right_whisper
+        # Allocate the whole output WAV once - header then int16 PCM - and
+        # let the DSP write each channel straight into its interleaved slots
+        wav = bytearray(44 + len(samples) * 2)
+        wav[:44] = _pack_wav_header(len(samples), sample_rate, channels)
+        whisper_frames = np.frombuffer(wav, dtype=np.int16, offset=44).reshape(-1, channels)
+        
+        # Process each channel: view the interleaved samples as (frames,
+        # channels) and hand every column to the DSP as a contiguous array
+        frames = samples.reshape(-1, channels)
+        if quick or len(frames) < SHORT_WHISPER_SECONDS * sample_rate:
+            whisperize = self._whisperize_quick
         else:
-            # Mono
-            whisper_samples = self._whisperize(samples, sample_rate)
+            whisperize = self._whisperize
+        for c in range(channels):
+            whisperize(np.ascontiguousarray(frames[:, c]), sample_rate, whisper_frames[:, c])
         
-        # Create whispered audio segment
-        whisper_audio = AudioSegment(
-            whisper_samples.tobytes(),
-            frame_rate=sample_rate,
-            sample_width=2,
-            channels=channels
-        )
-        
-        return whisper_audio
+        return wav
     
-    def _whisperize(self, samples, sample_rate):
-        """Transform speech samples into whisper - AGGRESSIVE version"""
-        # Normalize
-        samples = samples / (np.max(np.abs(samples)) + 1e-10)
+    def _whisperize(self, samples, sample_rate, out=None):
+        """Transform speech samples into whisper - AGGRESSIVE version
+        
+        Every linear step runs on one spectrum: a single rfft of the speech
+        and of the breath noise, and a single irfft at the end
+        
+        Args:
+            samples: Mono float32 samples
+            sample_rate: Sample rate in Hz
+            out: int16 array (or strided view) to write the result into;
+                allocated when None
+        """
+        n = len(samples)
+        
+        # Normalize - applied to the spectrum in _remove_pitch rather than as
+        # its own pass over the samples
+        gain = 1.0 / (np.max(np.abs(samples)) + 1e-10)
+        
+        # scipy.fft keeps float32 input as complex64 and can use every core
+        fft = spfft.rfft(samples, workers=-1)
         
         # 1. Remove pitch (flatten harmonics) - MORE AGGRESSIVE
-        samples = self._remove_pitch(samples, sample_rate)
+        self._remove_pitch(fft, sample_rate, gain)
         
         # 2. Add MORE pink noise (breath) - doubled
         noise_level = 0.15  # Increased from 0.08 for obvious breath
-        pink = self._generate_pink_noise(len(samples)) * noise_level
-        samples = samples + pink
+        pink = self._generate_pink_noise(n)
+        pink *= noise_level
+        fft += spfft.rfft(pink, workers=-1)
         
         # 3. High-pass filter (whispers have less bass) - HIGHER cutoff
-        nyquist = sample_rate / 2
-        cutoff = 500 / nyquist  # Increased from 300 Hz - more treble
-        b, a = signal.butter(4, cutoff, btype='high')
-        samples = signal.filtfilt(b, a, samples)
-        
-        # 4. Reduce amplitude MORE
-        samples = samples * 0.5  # Quieter - from 0.7
-        
-        # 5. Add band-pass emphasis on breath frequencies (2-8 kHz)
-        # This is where whisper "sibilance" lives
-        bp_low = 2000 / nyquist
-        bp_high = min(0.99, 8000 / nyquist)
-        b_bp, a_bp = signal.butter(2, [bp_low, bp_high], btype='band')
-        breath_emphasis = signal.filtfilt(b_bp, a_bp, samples) * 0.3
-        samples = samples + breath_emphasis
-        
-        # 6. Normalize and convert to int16
-        samples = samples / (np.max(np.abs(samples)) + 1e-10)
-        return (samples * 32767 * 0.9).astype(np.int16)
-    
-    def _remove_pitch(self, samples, sample_rate):
-        """Remove fundamental frequency to make speech unvoiced - AGGRESSIVE"""
-        fft = np.fft.rfft(samples)
+        # (500 Hz, up from 300 Hz - more treble), then emphasize the breath
+        # frequencies (2-8 kHz) where whisper "sibilance" lives
+        fft *= _whisper_response(n, sample_rate)
+        mixed = spfft.irfft(fft, n, workers=-1)
+        
+        # 4. Normalize to 90% and convert to int16, straight into out
+        mixed *= 32767 * 0.9 / (np.max(np.abs(mixed)) + 1e-10)
+        if out is None:
+            out = np.empty(n, dtype=np.int16)
+        np.copyto(out, mixed, casting='unsafe')
+        return out
+    
+    def _whisperize_quick(self, samples, sample_rate, out=None):
+        """Cheap whisper for very short clips: causal high-pass and less gain
+        
+        Args:
+            samples: Mono float32 samples
+            sample_rate: Sample rate in Hz
+            out: int16 array (or strided view) to write the result into;
+                allocated when None
+        """
+        # One causal IIR pass - no FFTs, no pink noise, no zero-phase rerun
+        samples = signal.sosfilt(_highpass_sos(sample_rate), samples)
+        
+        # Voiced speech sounds louder than whisper at the same peak, so
+        # normalize to half the full whisper's 90%
+        samples *= 32767 * 0.45 / (np.max(np.abs(samples)) + 1e-10)
+        if out is None:
+            out = np.empty(len(samples), dtype=np.int16)
+        np.copyto(out, samples, casting='unsafe')
+        return out
+    
+    def _remove_pitch(self, fft, sample_rate, gain=1.0):
+        """Remove fundamental frequency to make speech unvoiced - AGGRESSIVE
+        
+        Args:
+            fft: rfft of mono float32 samples, modified in place
+            sample_rate: Sample rate in Hz
+            gain: Extra scale applied to the output (e.g. for normalizing)
+        """
         magnitude = np.abs(fft)
-        phase = np.angle(fft)
         
         # Much more aggressive smoothing to flatten harmonics
         window_size = max(5, int(sample_rate / 20))  # Larger window = more flattening
-        smoothed = np.convolve(magnitude, np.ones(window_size)/window_size, mode='same')
-        
-        # Reduce overall magnitude to compensate for added noise
-        smoothed = smoothed * 0.6
-        
-        new_fft = smoothed * np.exp(1j * phase)
-        return np.fft.irfft(new_fft, len(samples))
+        # Running-mean filter: O(N) however wide the window is
+        smoothed = uniform_filter1d(magnitude, size=window_size, mode='nearest')
+        
+        # Rescale every bin to its smoothed magnitude, keeping its phase -
+        # in place, without an angle()/exp() round trip. The 0.6 reduces
+        # overall magnitude to compensate for added noise
+        np.maximum(magnitude, 1e-10, out=magnitude)
+        np.divide(smoothed, magnitude, out=smoothed)
+        smoothed *= 0.6 * gain
+        fft *= smoothed
     
     def _generate_pink_noise(self, length):
         """Generate pink noise (1/f) for breath simulation"""
-        white = np.random.randn(length)
-        fft = np.fft.rfft(white)
-        freqs = np.fft.rfftfreq(length)
-        freqs[0] = 1  # Avoid division by zero
-        pink_filter = 1 / np.sqrt(freqs)
-        pink_fft = fft * pink_filter
-        pink = np.fft.irfft(pink_fft, length)
-        return pink / (np.max(np.abs(pink)) + 1e-10)
-    
-    def _play_audio_segment(self, audio_segment):
-        """Play an AudioSegment using Windows"""
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_out:
-            temp_out_path = temp_out.name
-        
-        try:
-            audio_segment.export(temp_out_path, format="wav")
-            
-            import winsound
-            winsound.PlaySound(temp_out_path, winsound.SND_FILENAME)
-        finally:
-            try:
-                os.unlink(temp_out_path)
-            except:
-                pass
+        white = _rng.standard_normal(length, dtype=np.float32)
+        # One IIR pass instead of an rfft/irfft round trip
+        pink = _pink_kellett(white)
+        pink *= 1.0 / (np.max(np.abs(pink)) + 1e-10)
+        return pink
+    
+    def _play_wav_bytes(self, wav_bytes):
+        """Play in-memory WAV bytes using Windows"""
+        import winsound
+        winsound.PlaySound(wav_bytes, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
     
     def stop(self):
         """Stop the voice system"""
         self.should_stop = True
+        self._wake_workers()
         if self.engine:
             self.engine.stop()
         if self.worker_thread:
             self.worker_thread.join(timeout=2.0)
+        self._remove_scratch()
         if DEBUG_VOICE:
             print("🔇 Windows TTS stopped")
     
     def clear_queue(self):
         """Clear all pending speech"""
-        while not self.speech_queue.empty():
-            try:
-                self.speech_queue.get_nowait()
-            except queue.Empty:
-                break
+        self._drop_queued()
 
 
 # For backwards compatibility